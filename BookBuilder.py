@@ -2,12 +2,17 @@
 Main script for book generation system.
 Handles the orchestration of converting markdown files to a PDF book.
 """
+import hashlib
+import json
 import logging
 import sys
 from typing import List, Optional
 import os
 
-from core import Config, Chapter, ChapterCollection
+from core import (
+    Config, Chapter, ChapterCollection,
+    PANDOC_CACHE_FILENAME, PANDOC_CACHE_VERSION, BUILD_STAMP_FILENAME
+)
 from services import (
     PandocService, PandocConfig, PandocError,
     LaTeXService, LaTeXConfig, LaTeXError,
@@ -18,18 +23,27 @@ from utils import (
     safe_write_file, get_relative_path
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('book_generation.log', mode='w', encoding='utf-8')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
+def configure_logging() -> None:
+    """
+    Configure logging to stdout and the build log file.
+
+    Called from main() rather than at import time: worker processes started
+    with the spawn method re-import this module and would otherwise
+    truncate the log file.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(sys.stdout),
+            logging.FileHandler('book_generation.log', mode='w', encoding='utf-8')
+        ]
+    )
+
+
 class BookGenerator:
     """Main class for orchestrating book generation."""
     
@@ -83,6 +97,7 @@ class BookGenerator:
                 md_path=md_path,
                 part=current_act
             )
+            chapter.load()
             self.chapter_collection.add_chapter(chapter)
         
         if not self.chapter_collection.chapters:
@@ -91,54 +106,163 @@ class BookGenerator:
     def convert_chapters_to_tex(self) -> List[str]:
         """Convert all chapters to LaTeX files."""
         logger.info("\nConverting chapters to LaTeX...")
-        converted_files = []
-        
-        for i, chapter in enumerate(self.chapter_collection.chapters):
-            tex_file_name = f"tmp_{i}_{chapter.title.replace(' ', '_')}.tex"
-            tex_file_path = os.path.join(self.config.output_dir, tex_file_name)
-            
-            try:
-                self.pandoc.convert_to_latex(
-                    chapter.md_path,
-                    tex_file_path,
-                    self.config.filters_dir
-                )
-                converted_files.append(tex_file_path)
-            except (PandocError, FileNotFoundError) as e:
-                logger.error(f"Failed to convert chapter '{chapter.title}': {e}")
-                raise
-                
+        chapters = self.chapter_collection.chapters
+        converted_files = [
+            os.path.join(self.config.output_dir, f"tmp_{i}_{chapter.title.replace(' ', '_')}.tex")
+            for i, chapter in enumerate(chapters)
+        ]
+
+        if self.config.build.incremental:
+            fingerprints = self._chapter_fingerprints(chapters)
+            cache = self._load_pandoc_cache()
+            stale = [
+                i for i, tex_file_path in enumerate(converted_files)
+                if fingerprints[i] is None
+                or cache.get(os.path.basename(tex_file_path)) != fingerprints[i]
+                or not os.path.exists(tex_file_path)
+            ]
+            if len(stale) < len(chapters):
+                logger.info(f"Reusing LaTeX for {len(chapters) - len(stale)} unchanged chapter(s).")
+        else:
+            stale = list(range(len(chapters)))
+
+        if stale:
+            stale_chapters = [chapters[i] for i in stale]
+            stale_files = [converted_files[i] for i in stale]
+            if self.config.build.batch_pandoc:
+                self._convert_batched(stale_chapters, stale_files)
+            else:
+                self._convert_parallel(stale_chapters, stale_files)
+
+        if self.config.build.incremental:
+            self._save_pandoc_cache(cache, converted_files, fingerprints)
+
         return converted_files
 
+    def _pandoc_settings_digest(self) -> bytes:
+        """Hash everything besides the chapter text that affects pandoc's output."""
+        digest = hashlib.blake2b(digest_size=16)
+        # Batched runs parse each chapter on its own (--file-scope), so a
+        # chapter's LaTeX doesn't depend on the other chapters. Lua filters
+        # still see batched input differently (one document, temporary input
+        # files), so the mode is part of the key. Version 1 caches came from
+        # shared-scope batches.
+        digest.update(f"v{PANDOC_CACHE_VERSION}".encode('utf-8'))
+        digest.update(repr(self.pandoc.config).encode('utf-8'))
+        digest.update(b"batch" if self.config.build.batch_pandoc else b"single")
+        for lua_filter in self.config.build.lua_filters:
+            digest.update(lua_filter.encode('utf-8'))
+            try:
+                with open(os.path.join(self.config.filters_dir, lua_filter), 'rb') as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b"missing")
+        return digest.digest()
+
+    def _chapter_fingerprints(self, chapters: List[Chapter]) -> List[Optional[str]]:
+        """Hash each chapter's markdown together with the pandoc settings."""
+        settings_digest = self._pandoc_settings_digest()
+        fingerprints = []
+        for chapter in chapters:
+            if not os.path.exists(chapter.md_path):
+                # Let the conversion report the missing file
+                fingerprints.append(None)
+                continue
+            fingerprints.append(
+                hashlib.blake2b(settings_digest + chapter.text_bytes, digest_size=16).hexdigest()
+            )
+        return fingerprints
+
+    def _load_pandoc_cache(self) -> dict:
+        """Load the chapter fingerprints recorded by the previous build."""
+        cache_path = os.path.join(self.config.output_dir, PANDOC_CACHE_FILENAME)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return cache if isinstance(cache, dict) else {}
+
+    def _save_pandoc_cache(self,
+                           old_cache: dict,
+                           tex_file_paths: List[str],
+                           fingerprints: List[Optional[str]]) -> None:
+        """Record chapter fingerprints and remove LaTeX files of chapters that are gone."""
+        cache = {
+            os.path.basename(tex_file_path): fingerprint
+            for tex_file_path, fingerprint in zip(tex_file_paths, fingerprints)
+            if fingerprint is not None
+        }
+
+        for tex_file_name in old_cache.keys() - cache.keys():
+            tex_file_path = os.path.join(self.config.output_dir, tex_file_name)
+            if os.path.exists(tex_file_path):
+                try:
+                    os.remove(tex_file_path)
+                except OSError as e:
+                    logger.warning(f"Could not remove outdated '{tex_file_name}': {e}")
+
+        safe_write_file(
+            os.path.join(self.config.output_dir, PANDOC_CACHE_FILENAME),
+            json.dumps(cache, indent=2)
+        )
+
+    def _convert_batched(self, chapters: List[Chapter], tex_file_paths: List[str]) -> None:
+        """Convert chapters with a single pandoc run."""
+        try:
+            self.pandoc.convert_many(
+                [chapter.md_path for chapter in chapters],
+                tex_file_paths,
+                self.config.filters_dir,
+                sources=[chapter.text_bytes for chapter in chapters]
+            )
+        except (PandocError, FileNotFoundError) as e:
+            logger.error(f"Failed to convert chapters: {e}")
+            raise
+
+    def _convert_parallel(self, chapters: List[Chapter], tex_file_paths: List[str]) -> None:
+        """Convert chapters with one pandoc run each, several at a time."""
+        try:
+            self.pandoc.convert_batch(
+                [(chapter.md_path, tex_file_path)
+                 for chapter, tex_file_path in zip(chapters, tex_file_paths)],
+                self.config.filters_dir,
+                max_workers=min(self.config.build.pandoc_max_workers, os.cpu_count() or 1),
+                sources=[chapter.text_bytes for chapter in chapters]
+            )
+        except (PandocError, FileNotFoundError) as e:
+            logger.error(f"Failed to convert chapters: {e}")
+            raise
+
     def generate_main_tex(self, chapter_tex_files: List[str]) -> str:
         """Generate the main LaTeX file that includes all chapters."""
         logger.info("\nGenerating main LaTeX file...")
         main_tex_path = os.path.join(self.config.output_dir, self.config.build.main_tex_filename)
         
         # Replace placeholders in template
-        content = self.config.latex_template_content.replace(
-            "BOOK_TITLE", self.config.book_details.title
-        ).replace(
-            "BOOK_AUTHOR", self.config.book_details.author
-        ).replace(
-            "BOOK_DEDICATION", self.config.book_details.dedication
-        )
+        content = self.config.render_latex_template()
 
         # Add chapter includes
-        chapters_tex = ""
+        parts = [content]
         if not chapter_tex_files:
-            chapters_tex = "% No chapters found or processed.\n\\chapter*{Placeholder Chapter}\n"
-            chapters_tex += "Your book content will appear here.\n"
+            parts.append("% No chapters found or processed.\n\\chapter*{Placeholder Chapter}\n")
+            parts.append("Your book content will appear here.\n")
         else:
-            for tex_file in chapter_tex_files:
-                relative_path = get_relative_path(tex_file, self.config.output_dir).replace("\\", "/")
-                chapters_tex += f"\\clearpage\n\\input{{{relative_path}}}\n"
+            # Chapters are written straight into the output directory, so the
+            # relative path is usually just the file name
+            output_dir = self.config.output_dir
+            relative_paths = [
+                os.path.basename(tex_file) if os.path.dirname(tex_file) == output_dir
+                else get_relative_path(tex_file, output_dir).replace("\\", "/")
+                for tex_file in chapter_tex_files
+            ]
+            parts.extend(f"\\clearpage\n\\input{{{relative_path}}}\n" for relative_path in relative_paths)
 
         # Complete the document
-        content += chapters_tex + "\n\\end{document}\n"
+        parts.append("\n\\end{document}\n")
 
         try:
-            safe_write_file(main_tex_path, content)
+            safe_write_file(main_tex_path, "".join(parts))
             logger.info(f"Main LaTeX file created: {main_tex_path}")
         except IOError as e:
             logger.error(f"Failed to write main LaTeX file: {e}")
@@ -146,13 +270,15 @@ class BookGenerator:
 
         return main_tex_path
 
-    def compile_and_clean(self, main_tex_path: str) -> bool:
+    def compile_and_clean(self, main_tex_path: str, chapter_tex_files: List[str]) -> bool:
         """Compile the LaTeX file to PDF and clean up."""
         try:
             self.latex.compile_pdf(main_tex_path, self.config.output_dir)
             self.latex.cleanup_files(
                 self.config.output_dir,
-                self.config.build.main_tex_filename
+                self.config.build.main_tex_filename,
+                # Incremental builds reuse the converted chapters next time
+                [] if self.config.build.incremental else chapter_tex_files
             )
             logger.info("\nBuild process completed successfully.")
             return True
@@ -174,6 +300,73 @@ class BookGenerator:
             logger.error(f"Failed to generate statistics: {e}")
             raise
 
+    def _source_paths(self) -> List[str]:
+        """Return every file whose contents end up in the PDF."""
+        paths = [
+            self.config.config_file_path,
+            self.config.paths.longform_index_path,
+            self.config.latex_template_path
+        ]
+        # pandoc skips missing filters, and the fingerprint already accounts for them
+        filter_paths = (os.path.join(self.config.filters_dir, f) for f in self.config.build.lua_filters)
+        paths.extend(p for p in filter_paths if os.path.exists(p))
+        paths.extend(chapter.md_path for chapter in self.chapter_collection.chapters)
+        return paths
+
+    def _build_fingerprint(self) -> str:
+        """Hash the chapters, template and settings that the PDF is built from."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self._pandoc_settings_digest())
+        for path in (self.config.config_file_path, self.config.paths.longform_index_path):
+            try:
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b"missing")
+        digest.update(self.config.render_latex_template().encode('utf-8'))
+        for chapter in self.chapter_collection.chapters:
+            digest.update(f"{chapter.title}\0{chapter.part}\0{len(chapter.text_bytes)}\0".encode('utf-8'))
+            digest.update(chapter.text_bytes)
+        return digest.hexdigest()
+
+    def _pdf_path(self) -> str:
+        """Get the path of the PDF produced by the LaTeX compilation."""
+        return os.path.join(
+            self.config.output_dir,
+            self.config.build.main_tex_filename.replace(".tex", ".pdf")
+        )
+
+    def is_up_to_date(self) -> bool:
+        """
+        Check whether the existing PDF was built from the current sources.
+
+        Any source newer than the PDF means a rebuild. Otherwise the build
+        stamp's content hash decides, which also catches changes that
+        modification times miss (clock skew, restored files).
+        """
+        pdf_path = self._pdf_path()
+        stamp_path = os.path.join(self.config.output_dir, BUILD_STAMP_FILENAME)
+        if not os.path.exists(pdf_path):
+            return False
+
+        try:
+            with open(stamp_path, 'r', encoding='utf-8') as f:
+                stamp = json.load(f)
+            pdf_mtime = os.path.getmtime(pdf_path)
+            if any(os.path.getmtime(p) > pdf_mtime for p in self._source_paths()):
+                return False
+        except (OSError, ValueError):
+            return False
+
+        return isinstance(stamp, dict) and stamp.get("fingerprint") == self._build_fingerprint()
+
+    def write_build_stamp(self) -> None:
+        """Record the fingerprint of the sources the current PDF was built from."""
+        safe_write_file(
+            os.path.join(self.config.output_dir, BUILD_STAMP_FILENAME),
+            json.dumps({"fingerprint": self._build_fingerprint()}, indent=2)
+        )
+
     def run(self) -> int:
         """
         Run the complete book generation process.
@@ -191,15 +384,22 @@ class BookGenerator:
 
             # Process chapters
             self.load_chapters()
+            if self.config.build.incremental and self.is_up_to_date():
+                logger.info("No changes detected - skipping build.")
+                return 0
+
             converted_files = self.convert_chapters_to_tex()
             
             # Generate and compile main TeX file
             main_tex_path = self.generate_main_tex(converted_files)
-            if not self.compile_and_clean(main_tex_path):
+            if not self.compile_and_clean(main_tex_path, converted_files):
                 return 1
 
             # Generate statistics
             self.generate_statistics()
+
+            if self.config.build.incremental:
+                self.write_build_stamp()
             
             return 0
 
@@ -210,6 +410,7 @@ class BookGenerator:
 
 def main() -> int:
     """Main entry point for the book generation script."""
+    configure_logging()
     generator = BookGenerator()
     return generator.run()
 
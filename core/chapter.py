@@ -1,9 +1,98 @@
 """
 Chapter class and related functionality for managing book chapters.
 """
-from dataclasses import dataclass
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
 import os
+import re
+
+# Bytes that str.split() treats as whitespace, mapped to b" " and every other
+# byte to b"x". Each b" x" in the translated text then starts a word.
+_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+_WORD_TABLE = bytes(0x20 if i in _WHITESPACE else 0x78 for i in range(256))
+
+# ASCII word characters are ruled out by the pattern itself; a non-ASCII
+# neighbour is decoded and checked by _count_todos, since bytes patterns
+# only know ASCII word boundaries
+_TODO_RE = re.compile(rb'(?<![A-Za-z0-9_])TODO(?![A-Za-z0-9_])', re.IGNORECASE)
+_COMMENT_MARKER = b'%%'
+_WHITESPACE_RE = re.compile(rb'[ \t\n\r\x0b\x0c\x1c-\x1f]')
+
+# Small enough for a chunk to stay in cache while all counts run over it
+_STATS_CHUNK_SIZE = 64 * 1024
+
+# Below this much text, starting worker processes costs more than it saves
+_PARALLEL_STATS_MIN_BYTES = 4 * 1024 * 1024
+
+
+def _count_words(data: bytes) -> int:
+    """Count whitespace-separated words without building a list of them."""
+    translated = data.translate(_WORD_TABLE)
+    return translated.count(b" x") + translated.startswith(b"x")
+
+
+def _is_word_char_before(data: bytes, pos: int) -> bool:
+    """Check whether the UTF-8 character ending at pos is a (Unicode) word character."""
+    start = pos - 1
+    # Step back over continuation bytes to the start of the character
+    while start > 0 and pos - start < 4 and 0x80 <= data[start] < 0xC0:
+        start -= 1
+    return data[start:pos].decode("utf-8", errors="replace")[-1:].isalnum()
+
+
+def _is_word_char_after(data: bytes, pos: int) -> bool:
+    """Check whether the UTF-8 character starting at pos is a (Unicode) word character."""
+    return data[pos:pos + 4].decode("utf-8", errors="replace")[:1].isalnum()
+
+
+def _count_todos(data: bytes) -> int:
+    """Count TODO markers with the same word boundaries as a str regex with \\b."""
+    todos = 0
+    for match in _TODO_RE.finditer(data):
+        start, end = match.span()
+        if start > 0 and data[start - 1] >= 0x80 and _is_word_char_before(data, start):
+            continue
+        if end < len(data) and data[end] >= 0x80 and _is_word_char_after(data, end):
+            continue
+        todos += 1
+    return todos
+
+
+def _chunk_end(data: bytes, start: int) -> int:
+    """Return where the chunk starting at start should end, just past a whitespace byte."""
+    end = start + _STATS_CHUNK_SIZE
+    if end >= len(data):
+        return len(data)
+    # Any whitespace will do; newlines and spaces are found closest to the end
+    for ws in (b"\n", b" "):
+        cut = data.rfind(ws, start, end)
+        if cut != -1:
+            return cut + 1
+    match = _WHITESPACE_RE.search(data, start)
+    return match.end() if match else len(data)
+
+
+def _scan_stats(data: bytes) -> Tuple[int, int, int]:
+    """
+    Count words, TODOs and comments in a single pass over the text.
+
+    The text is processed in cache-sized chunks cut at whitespace, so no
+    word (and therefore no TODO or %% marker) spans two chunks.
+
+    Returns:
+        Tuple of (word count, TODO count, comment count)
+    """
+    words = todos = comments = 0
+    start = 0
+    while start < len(data):
+        end = _chunk_end(data, start)
+        chunk = data[start:end]
+        words += _count_words(chunk)
+        todos += _count_todos(chunk)
+        comments += chunk.count(_COMMENT_MARKER)
+        start = end
+    return words, todos, comments
 
 
 @dataclass
@@ -14,32 +103,65 @@ class Chapter:
     md_path: str
     part: int = 0
     _text: Optional[str] = None
+    _text_bytes: Optional[bytes] = None
     _word_count: Optional[int] = None
+    _todo_count: Optional[int] = None
+    _comment_count: Optional[int] = None
+    # Collection caching values derived from this chapter, told when it reloads
+    _collection: Optional["ChapterCollection"] = field(default=None, repr=False, compare=False)
+
+    @property
+    def text_bytes(self) -> bytes:
+        """Lazy load and return the raw chapter file contents."""
+        if self._text_bytes is None:
+            self._text_bytes = self._load_bytes()
+        return self._text_bytes
 
     @property
     def text(self) -> str:
         """Lazy load and return the chapter text."""
         if self._text is None:
-            self._text = self._load_text()
+            self._text = self.text_bytes.decode("utf-8")
         return self._text
 
     @property
     def chapter_length(self) -> int:
         """Return the word count of the chapter."""
         if self._word_count is None:
-            self._word_count = len(self.text.split())
+            self._compute_stats()
         return self._word_count
 
-    def _load_text(self) -> str:
-        """Load the chapter text from file."""
+    def load(self) -> None:
+        """
+        Read the chapter file now rather than on first use.
+
+        The text, the statistics and the pandoc conversion all reuse these
+        bytes, so the file is only read once per build.
+        """
+        self._text_bytes = self._load_bytes()
+        self._text = None
+        self._word_count = self._todo_count = self._comment_count = None
+        if self._collection is not None:
+            self._collection._reset_derived()
+
+    def _compute_stats(self) -> None:
+        """Compute word, TODO and comment counts in one pass over the file contents."""
+        self._set_stats(_scan_stats(self.text_bytes))
+
+    def _set_stats(self, stats: Tuple[int, int, int]) -> None:
+        """Store word, TODO and comment counts computed elsewhere."""
+        self._word_count, self._todo_count, self._comment_count = stats
+
+    def _load_bytes(self) -> bytes:
+        """Load the chapter file contents."""
         if not os.path.exists(self.md_path):
-            return ""
+            return b""
         try:
-            with open(self.md_path, "r", encoding="utf-8") as f:
+            with open(self.md_path, "rb") as f:
                 return f.read()
         except IOError as e:
             print(f"Error reading chapter file '{self.md_path}': {e}")
-            return ""
+            return b""
 
     def is_full_chapter(self) -> bool:
         """Check if this is a full chapter (not a fragment or placeholder)."""
@@ -47,27 +169,69 @@ class Chapter:
 
     def count_todos(self) -> int:
         """Count the number of TODO items in the chapter."""
-        import re
-        return len(re.findall(r'\bTODO\b', self.text, re.IGNORECASE))
+        if self._todo_count is None:
+            self._compute_stats()
+        return self._todo_count
 
     def count_comments(self) -> int:
         """Count the number of comments in the chapter."""
-        import re
-        return len(re.findall(r'%%', self.text, re.MULTILINE))
+        if self._comment_count is None:
+            self._compute_stats()
+        return self._comment_count
 
 
 class ChapterCollection:
     """Manages a collection of chapters."""
     def __init__(self):
         self.chapters: list[Chapter] = []
+        # Derived values, kept up to date (or reset) by add_chapter and
+        # by a chapter's load()
+        self._max_part: int = 0
+        self._total_words: Optional[int] = None
+        self._full_chapters: Optional[list[Chapter]] = None
 
     def add_chapter(self, chapter: Chapter) -> None:
         """Add a chapter to the collection."""
         self.chapters.append(chapter)
+        chapter._collection = self
+        self._max_part = max(self._max_part, chapter.part)
+        self._reset_derived()
+
+    def _reset_derived(self) -> None:
+        """Forget the values derived from the chapters' contents."""
+        self._total_words = None
+        self._full_chapters = None
 
     def get_full_chapters(self) -> list[Chapter]:
         """Return only the full chapters (not fragments or placeholders)."""
-        return [ch for ch in self.chapters if ch.is_full_chapter()]
+        if self._full_chapters is None:
+            self._full_chapters = [ch for ch in self.chapters if ch.is_full_chapter()]
+        return self._full_chapters
+
+    def compute_all_stats(self, max_workers: Optional[int] = None) -> None:
+        """
+        Compute the statistics of every chapter up front.
+
+        Large books are scanned in worker processes, since the counting is
+        CPU-bound and holds the GIL. Results are stored on each chapter, so
+        later reads of chapter_length, count_todos and count_comments are free.
+
+        Args:
+            max_workers: Maximum number of worker processes (default: CPU count)
+        """
+        pending = [ch for ch in self.chapters if ch._word_count is None]
+        if not pending:
+            return
+
+        data = [ch.text_bytes for ch in pending]
+        if sum(len(d) for d in data) < _PARALLEL_STATS_MIN_BYTES or (os.cpu_count() or 1) < 2:
+            results = [_scan_stats(d) for d in data]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_scan_stats, data))
+
+        for chapter, stats in zip(pending, results):
+            chapter._set_stats(stats)
 
     def get_chapters_by_part(self, part: int) -> list[Chapter]:
         """Return all chapters in a specific part/act."""
@@ -75,13 +239,15 @@ class ChapterCollection:
 
     def total_word_count(self) -> int:
         """Return total word count across all chapters."""
-        return sum(ch.chapter_length for ch in self.chapters)
+        if self._total_words is None:
+            self._total_words = sum(ch.chapter_length for ch in self.chapters)
+        return self._total_words
 
     def number_of_acts(self) -> int:
         """Return the total number of acts/parts in the book."""
         if not self.chapters:
             return 0
-        return int(max(ch.part for ch in self.chapters))
+        return int(self._max_part)
 
     def get_shortest_chapter(self) -> Optional[Chapter]:
         """Return the shortest chapter by word count."""
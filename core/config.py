@@ -3,15 +3,34 @@ Configuration management for the book generation system.
 """
 from dataclasses import dataclass, field
 from typing import List, Optional
+import functools
 import os
+import re
 import yaml
 from .constants import (
     DEFAULT_BOOK_TITLE, DEFAULT_BOOK_AUTHOR, DEFAULT_OUTPUT_DIR_NAME,
     DEFAULT_FILTERS_DIR_NAME, DEFAULT_LATEX_TEMPLATE_FILE, DEFAULT_MAIN_TEX_FILENAME,
     DEFAULT_STATISTICS_FILENAME, DEFAULT_LONGFORM_INDEX_PATH, DEFAULT_PDF_FILENAME_TEMPLATE,
-    DEFAULT_LUA_FILTERS, DEFAULT_PART_DIVIDER, PROJECT_ROOT, CONFIG_DIR
+    DEFAULT_LUA_FILTERS, DEFAULT_PART_DIVIDER, DEFAULT_BATCH_PANDOC, DEFAULT_PANDOC_MAX_WORKERS,
+    DEFAULT_INCREMENTAL_BUILD, PROJECT_ROOT, CONFIG_DIR
 )
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
+# Placeholders in the LaTeX template that are filled in with the book details
+TEMPLATE_PLACEHOLDER_RE = re.compile(r"(BOOK_TITLE|BOOK_AUTHOR|BOOK_DEDICATION)")
+
+
+@functools.lru_cache(maxsize=None)
+def _parse_yaml_file(filepath: str, mtime: float) -> dict:
+    """Parse the first YAML document in a file, cached until the file changes."""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        data = next(yaml.load_all(f, Loader=YamlLoader), {})
+        return data if isinstance(data, dict) else {}
+
 
 @dataclass
 class BookDetails:
@@ -38,6 +57,9 @@ class BuildConfig:
     pdf_filename_template: str = DEFAULT_PDF_FILENAME_TEMPLATE
     statistics_filename: str = DEFAULT_STATISTICS_FILENAME
     lua_filters: List[str] = field(default_factory=lambda: DEFAULT_LUA_FILTERS)
+    batch_pandoc: bool = DEFAULT_BATCH_PANDOC
+    pandoc_max_workers: int = DEFAULT_PANDOC_MAX_WORKERS
+    incremental: bool = DEFAULT_INCREMENTAL_BUILD
 
 
 class Config:
@@ -47,6 +69,7 @@ class Config:
         self.paths = PathConfig()
         self.build = BuildConfig()
         self.latex_template_content: str = ""
+        self._latex_template_parts: List[str] = []
         self.chapter_titles: List[str] = []
         self._load_config()
         self._load_longform_index()
@@ -70,17 +93,14 @@ class Config:
             return {}
 
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = next(yaml.safe_load_all(f), {})
-                return data if isinstance(data, dict) else {}
+            return _parse_yaml_file(filepath, os.path.getmtime(filepath))
         except (yaml.YAMLError, IOError) as e:
             print(f"Error reading {filepath}: {e}")
             return {}
 
     def _load_config(self) -> None:
         """Load main configuration file."""
-        config_file_path = os.path.join(CONFIG_DIR, 'config.yml')
-        config_data = self._load_yaml_file(config_file_path)
+        config_data = self._load_yaml_file(self.config_file_path)
 
         # Book details
         self.book_details.title = self._deep_get(config_data, 'book_details.title', DEFAULT_BOOK_TITLE)
@@ -100,6 +120,14 @@ class Config:
         self.build.statistics_filename = self._deep_get(config_data, 'build_settings.statistics_filename', DEFAULT_STATISTICS_FILENAME)
         lua_filters = self._deep_get(config_data, 'build_settings.lua_filters', DEFAULT_LUA_FILTERS)
         self.build.lua_filters = lua_filters if isinstance(lua_filters, list) else DEFAULT_LUA_FILTERS
+        self.build.batch_pandoc = bool(self._deep_get(config_data, 'build_settings.batch_pandoc', DEFAULT_BATCH_PANDOC))
+        pandoc_max_workers = self._deep_get(config_data, 'build_settings.pandoc_max_workers', DEFAULT_PANDOC_MAX_WORKERS)
+        try:
+            self.build.pandoc_max_workers = int(pandoc_max_workers)
+        except (TypeError, ValueError):
+            print(f"Warning: Invalid pandoc_max_workers '{pandoc_max_workers}', using {DEFAULT_PANDOC_MAX_WORKERS}")
+            self.build.pandoc_max_workers = DEFAULT_PANDOC_MAX_WORKERS
+        self.build.incremental = bool(self._deep_get(config_data, 'build_settings.incremental', DEFAULT_INCREMENTAL_BUILD))
 
     def _load_longform_index(self) -> None:
         """Load Longform index file and extract chapter titles."""
@@ -120,7 +148,7 @@ class Config:
 
     def _load_latex_template(self) -> None:
         """Load LaTeX template content."""
-        template_path = os.path.join(PROJECT_ROOT, self.paths.latex_template_file)
+        template_path = self.latex_template_path
         try:
             with open(template_path, 'r', encoding='utf-8') as f:
                 self.latex_template_content = f.read()
@@ -128,6 +156,30 @@ class Config:
             print(f"Error reading LaTeX template '{template_path}': {e}")
             self.latex_template_content = ""
 
+        # Alternating literal text and placeholder names, placeholders at odd indices
+        self._latex_template_parts = TEMPLATE_PLACEHOLDER_RE.split(self.latex_template_content)
+
+    def render_latex_template(self) -> str:
+        """Return the LaTeX template with the book details filled in."""
+        values = {
+            "BOOK_TITLE": self.book_details.title,
+            "BOOK_AUTHOR": self.book_details.author,
+            "BOOK_DEDICATION": self.book_details.dedication
+        }
+        parts = list(self._latex_template_parts)
+        parts[1::2] = [values[placeholder] for placeholder in parts[1::2]]
+        return "".join(parts)
+
+    @property
+    def config_file_path(self) -> str:
+        """Get the full path to the main configuration file."""
+        return os.path.join(CONFIG_DIR, 'config.yml')
+
+    @property
+    def latex_template_path(self) -> str:
+        """Get the full path to the LaTeX template."""
+        return os.path.join(PROJECT_ROOT, self.paths.latex_template_file)
+
     @property
     def output_dir(self) -> str:
         """Get the full path to the output directory."""
@@ -22,6 +22,12 @@ DEFAULT_KEEP_MAIN_TEX = False
 DEFAULT_KEEP_LOG_ON_ERROR = True
 DEFAULT_KEEP_LOG_ON_SUCCESS = False
 DEFAULT_PART_DIVIDER = "Part"
+DEFAULT_BATCH_PANDOC = True  # Convert all chapters in a single pandoc run
+DEFAULT_PANDOC_MAX_WORKERS = 8  # Parallel pandoc runs when not batching
+DEFAULT_INCREMENTAL_BUILD = True  # Only reconvert chapters that changed
+PANDOC_CACHE_FILENAME = ".pandoc_cache.json"  # Stored in the output directory
+PANDOC_CACHE_VERSION = 2  # Bump when converted chapters from older builds can't be reused
+BUILD_STAMP_FILENAME = ".build_stamp.json"  # Stored in the output directory
 
 # Standard directory locations
 CONFIG_DIR = os.path.join(PROJECT_ROOT, 'config')
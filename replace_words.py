@@ -1,16 +1,44 @@
+import mmap
 import os
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+def replace_in_file(file_path, a, b):
+    # a and b are UTF-8 bytes; replacing bytes is the same as replacing text
+    with open(file_path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(a) == -1:
+                    return False
+                content = mm[:]
+        except ValueError:  # empty files can't be mapped
+            return False
+
+    # Write to a temp file next to the original and swap it in atomically
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content.replace(a, b))
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return True
 
 def replace_words(directory, a, b):
-    for root, _, files in os.walk(directory):
-        for file in files:
-            if file.endswith('.md'):
-                file_path = os.path.join(root, file)
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                content = content.replace(a, b)
-                with open(file_path, 'w') as f:
-                    f.write(content)
+    a = a.encode('utf-8')
+    b = b.encode('utf-8')
+    file_paths = [
+        os.path.join(root, file)
+        for root, _, files in os.walk(directory)
+        for file in files
+        if file.endswith('.md')
+    ]
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(lambda file_path: replace_in_file(file_path, a, b), file_paths))
 
 if __name__ == '__main__':
     if len(sys.argv) != 4:
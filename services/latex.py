@@ -5,7 +5,8 @@ from dataclasses import dataclass
 import os
 import subprocess
 import shutil
-import glob
+import hashlib
+from collections import deque
 from typing import List, Optional
 
 
@@ -20,7 +21,20 @@ class LaTeXConfig:
     keep_main_tex: bool = False
     keep_log_on_error: bool = True
     keep_log_on_success: bool = False
-    num_passes: int = 3  # Number of compilation passes
+    num_passes: int = 3  # Maximum number of pdflatex passes
+    use_latexmk: bool = True  # Let latexmk decide the passes when it is installed
+    cache_aux: bool = True  # Keep reference files between builds to save passes
+    cache_dir_name: str = ".build_cache"  # Created inside the output directory
+
+
+# Files whose contents change while cross-references are still settling
+REFERENCE_EXTENSIONS = ["aux", "toc", "out", "lof", "lot"]
+
+# Files carried over to the next build when cache_aux is enabled
+CACHED_EXTENSIONS = [*REFERENCE_EXTENSIONS, "fls", "fdb_latexmk"]
+
+# Lines of LaTeX output kept for error messages
+OUTPUT_TAIL_LINES = 200
 
 
 class LaTeXService:
@@ -32,37 +46,172 @@ class LaTeXService:
         """Check if pdflatex is available in the system."""
         return bool(shutil.which("pdflatex"))
 
-    def _run_pdflatex(self, main_tex_path: str, output_dir: str, pass_num: int) -> subprocess.CompletedProcess:
-        """Run a single pass of pdflatex."""
+    def is_latexmk_available(self) -> bool:
+        """Check if latexmk is available in the system."""
+        return bool(shutil.which("latexmk"))
+
+    def _run_pdflatex(self,
+                      main_tex_path: str,
+                      output_dir: str,
+                      pass_num: int,
+                      is_final: bool = True) -> None:
+        """
+        Run a single pass of pdflatex.
+
+        Non-final passes only exist to settle the .aux/.toc data, so they run
+        in draft mode (no PDF output) and batch mode (no terminal output).
+        """
         print(f"  pdflatex Pass {pass_num}...")
         
         cmd = [
             "pdflatex",
             f"-output-directory={output_dir}",
+            "-file-line-error"
+        ]
+        if is_final:
+            cmd.append("-interaction=nonstopmode")
+        else:
+            cmd.extend(["-interaction=batchmode", "-halt-on-error", "-draftmode"])
+        cmd.append(main_tex_path)
+
+        # In batch mode the errors only go to the log, so report from there
+        log_path = None if is_final else os.path.join(
+            output_dir, os.path.splitext(os.path.basename(main_tex_path))[0] + ".log"
+        )
+        self._run_command(cmd, output_dir, f"Pass {pass_num}", log_path)
+
+    def _run_latexmk(self, main_tex_path: str, output_dir: str) -> None:
+        """Run latexmk, which reruns pdflatex until the references are stable."""
+        print("  latexmk...")
+
+        cmd = [
+            "latexmk",
+            "-pdf",
+            f"-outdir={output_dir}",
             "-interaction=nonstopmode",
             "-file-line-error",
             main_tex_path
         ]
 
+        self._run_command(cmd, output_dir, "latexmk")
+
+    def _run_command(self,
+                     cmd: List[str],
+                     output_dir: str,
+                     step: str,
+                     log_path: Optional[str] = None) -> None:
+        """
+        Run a LaTeX command, turning failures into LaTeXError.
+
+        The output is read line by line as it is produced and only the last
+        OUTPUT_TAIL_LINES lines are kept for the error message. If log_path
+        is given, the end of that log file is added to the message as well.
+        """
         try:
-            return subprocess.run(
+            with subprocess.Popen(
                 cmd,
                 cwd=output_dir,
-                check=True,
-                capture_output=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
                 text=True,
                 encoding='utf-8',
                 errors='replace'
-            )
-        except subprocess.CalledProcessError as e:
-            error_msg = f"LaTeX compilation failed (Pass {pass_num}):\n"
-            if e.stdout:
-                error_msg += f"STDOUT:\n{e.stdout}\n"
-            if e.stderr:
-                error_msg += f"STDERR:\n{e.stderr}"
-            raise LaTeXError(error_msg) from e
+            ) as process:
+                tail = deque(process.stdout, maxlen=OUTPUT_TAIL_LINES)
         except FileNotFoundError:
-            raise LaTeXError("pdflatex command not found. Is it installed and in your PATH?")
+            raise LaTeXError(f"{cmd[0]} command not found. Is it installed and in your PATH?")
+
+        if process.returncode != 0:
+            error_msg = f"LaTeX compilation failed ({step}):\n"
+            if tail:
+                error_msg += f"OUTPUT (last {len(tail)} lines):\n{''.join(tail)}"
+            if log_path:
+                try:
+                    with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+                        log_tail = deque(f, maxlen=OUTPUT_TAIL_LINES)
+                    error_msg += f"\nLOG '{log_path}' (last {len(log_tail)} lines):\n{''.join(log_tail)}"
+                except OSError:
+                    error_msg += f"\nSee '{log_path}' for detailed LaTeX messages."
+            raise LaTeXError(error_msg)
+
+    def _reference_fingerprint(self, main_tex_path: str, output_dir: str) -> bytes:
+        """Hash the cross-reference files written by the last pdflatex pass."""
+        stem = os.path.splitext(os.path.basename(main_tex_path))[0]
+        digest = hashlib.md5(usedforsecurity=False)
+        for ext in REFERENCE_EXTENSIONS:
+            try:
+                with open(os.path.join(output_dir, f"{stem}.{ext}"), 'rb') as f:
+                    digest.update(ext.encode())
+                    digest.update(f.read())
+            except FileNotFoundError:
+                continue
+        return digest.digest()
+
+    def _run_pdflatex_passes(self, main_tex_path: str, output_dir: str) -> None:
+        """
+        Run draft passes until the cross-references stop changing, then the final pass.
+
+        A draft pass that leaves the .aux/.toc files unchanged read the same
+        data it wrote, so one more (final) pass produces a settled PDF.
+        """
+        pass_num = 0
+        while pass_num < self.config.num_passes - 1:
+            pass_num += 1
+            before = self._reference_fingerprint(main_tex_path, output_dir)
+            self._run_pdflatex(main_tex_path, output_dir, pass_num, is_final=False)
+            if self._reference_fingerprint(main_tex_path, output_dir) == before:
+                break
+
+        self._run_pdflatex(main_tex_path, output_dir, pass_num + 1, is_final=True)
+
+    def _cache_key(self, main_tex_path: str) -> str:
+        """
+        Hash the preamble of the main TeX file.
+
+        Reference files written under a different preamble may use macros
+        that are no longer defined, so they are only restored when it matches.
+        """
+        with open(main_tex_path, 'rb') as f:
+            preamble = f.read().split(b"\\begin{document}", 1)[0]
+        return hashlib.md5(preamble, usedforsecurity=False).hexdigest()
+
+    def _restore_cached_files(self, main_tex_path: str, output_dir: str) -> None:
+        """Move reference files cached by the previous build back into the output directory."""
+        cache_dir = os.path.join(output_dir, self.config.cache_dir_name)
+        stem = os.path.splitext(os.path.basename(main_tex_path))[0]
+
+        try:
+            with open(os.path.join(cache_dir, f"{stem}.key"), 'r', encoding='utf-8') as f:
+                cached_key = f.read().strip()
+        except FileNotFoundError:
+            return
+        if cached_key != self._cache_key(main_tex_path):
+            return
+
+        for ext in CACHED_EXTENSIONS:
+            cached_path = os.path.join(cache_dir, f"{stem}.{ext}")
+            target_path = os.path.join(output_dir, f"{stem}.{ext}")
+            # Files left behind by a failed build are newer than the cache
+            if os.path.exists(cached_path) and not os.path.exists(target_path):
+                os.replace(cached_path, target_path)
+
+    def _store_cached_files(self, main_tex_path: str, output_dir: str) -> None:
+        """Move the reference files of a successful build into the cache directory."""
+        cache_dir = os.path.join(output_dir, self.config.cache_dir_name)
+        stem = os.path.splitext(os.path.basename(main_tex_path))[0]
+        os.makedirs(cache_dir, exist_ok=True)
+
+        for ext in CACHED_EXTENSIONS:
+            f_path = os.path.join(output_dir, f"{stem}.{ext}")
+            if os.path.exists(f_path):
+                try:
+                    os.replace(f_path, os.path.join(cache_dir, f"{stem}.{ext}"))
+                    print(f"  Cached '{os.path.basename(f_path)}'")
+                except OSError as e:
+                    print(f"  Error caching '{os.path.basename(f_path)}': {e}")
+
+        with open(os.path.join(cache_dir, f"{stem}.key"), 'w', encoding='utf-8') as f:
+            f.write(self._cache_key(main_tex_path))
 
     def compile_pdf(self, main_tex_path: str, output_dir: str) -> str:
         """
@@ -84,9 +233,14 @@ class LaTeXService:
 
         print(f"\nCompiling '{os.path.basename(main_tex_path)}' to PDF...")
 
-        # Run multiple passes for references and ToC
-        for i in range(self.config.num_passes):
-            self._run_pdflatex(main_tex_path, output_dir, i + 1)
+        if self.config.cache_aux:
+            self._restore_cached_files(main_tex_path, output_dir)
+
+        # Run as many passes as the references and ToC need
+        if self.config.use_latexmk and self.is_latexmk_available():
+            self._run_latexmk(main_tex_path, output_dir)
+        else:
+            self._run_pdflatex_passes(main_tex_path, output_dir)
 
         # Check for output PDF
         pdf_name = os.path.basename(main_tex_path).replace(".tex", ".pdf")
@@ -102,38 +256,44 @@ class LaTeXService:
         print(f"\nSuccessfully compiled. PDF available at: '{pdf_path}'")
         return pdf_path
 
-    def cleanup_files(self, output_dir: str, main_tex_filename: str) -> None:
+    def cleanup_files(self,
+                      output_dir: str,
+                      main_tex_filename: str,
+                      tmp_tex_files: Optional[List[str]] = None) -> None:
         """
         Clean up intermediate LaTeX files.
         
         Args:
             output_dir: Directory containing the files to clean
             main_tex_filename: Name of the main TeX file
+            tmp_tex_files: Paths of the intermediate chapter TeX files to remove
         """
         print("\nCleaning up intermediate files...")
+
+        # Keep reference files for the next build before anything is deleted
+        main_tex_path = os.path.join(output_dir, main_tex_filename)
+        if self.config.cache_aux and os.path.exists(main_tex_path):
+            self._store_cached_files(main_tex_path, output_dir)
         
         # Extensions to clean up
-        extensions = ["aux", "toc", "out", "lof", "lot", "bbl", "blg", "synctex.gz"]
+        extensions = {*REFERENCE_EXTENSIONS, "bbl", "blg", "fls", "fdb_latexmk"}
         if not self.config.keep_log_on_success:
-            extensions.append("log")
-
-        # Clean up each file type
-        for ext in extensions:
-            pattern = os.path.join(output_dir, f"*.{ext}")
-            for f_path in glob.glob(pattern):
-                # Skip log file if it should be kept
-                if (ext == "log" and 
-                    os.path.basename(f_path) == main_tex_filename.replace(".tex", ".log") and
-                    self.config.keep_log_on_success):
-                    continue
-                try:
-                    os.remove(f_path)
-                    print(f"  Deleted '{os.path.basename(f_path)}'")
-                except OSError as e:
-                    print(f"  Error deleting '{os.path.basename(f_path)}': {e}")
+            extensions.add("log")
+
+        # Collect everything to delete in a single pass over the directory
+        to_delete = []
+        with os.scandir(output_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                _, dot, ext = name.rpartition('.')
+                if (dot and ext in extensions) or name.endswith(".synctex.gz"):
+                    if entry.is_file():
+                        to_delete.append(entry.path)
+
+        # The chapter files are known, no need to search for them
+        to_delete.extend(tmp_tex_files or [])
 
-        # Clean up temporary TeX files
-        for f_path in glob.glob(os.path.join(output_dir, "tmp_*.tex")):
+        for f_path in to_delete:
             try:
                 os.remove(f_path)
                 print(f"  Deleted '{os.path.basename(f_path)}'")
@@ -142,7 +302,6 @@ class LaTeXService:
 
         # Handle main TeX file
         if not self.config.keep_main_tex:
-            main_tex_path = os.path.join(output_dir, main_tex_filename)
             if os.path.exists(main_tex_path):
                 try:
                     os.remove(main_tex_path)
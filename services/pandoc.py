@@ -1,12 +1,35 @@
 """
 Service for handling Pandoc document conversions.
 """
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import subprocess
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
+import re
 import shutil
+import tempfile
+from utils import safe_write_file
 
+# Raw LaTeX block placed between sources in a batch conversion. Raw blocks are
+# passed through untouched by pandoc and Lua filters, so the marker comment
+# shows up verbatim in the output and can be split on.
+_BATCH_MARKER = "%BOOKBUILDER-BATCH-CD985272F78311"
+_BATCH_SEPARATOR = f"```{{=latex}}\n{_BATCH_MARKER}\n```\n"
+
+# Name of the n-th source file in a batch conversion
+_BATCH_SOURCE_NAME = "bookbuilder-source-{}.md"
+
+# Empty span appended to each source in a batch conversion. With --file-scope,
+# pandoc 3 prefixes identifiers with an identifier made from the file path;
+# the probe's label shows which prefix that is, so it can be removed again.
+_BATCH_PROBE_ID = "bookbuilder-batch-probe"
+_BATCH_PROBE = f"\n\n[]{{#{_BATCH_PROBE_ID}}}\n".encode('utf-8')
+_BATCH_PROBE_RE = re.compile(
+    r"^(?:\\protect\\phantomsection)?\\(?:label|hypertarget)\{([^{}\n]*)"
+    + re.escape(_BATCH_PROBE_ID) + r"\}(?:\{\})?[ \t]*$",
+    re.MULTILINE
+)
 
 @dataclass
 class PandocConfig:
@@ -33,50 +56,74 @@ class PandocService:
     """Service for handling Pandoc document conversions."""
     def __init__(self, config: PandocConfig = None):
         self.config = config or PandocConfig()
+        # Existing LUA filter paths, per filters directory
+        self._resolved_filters: Dict[str, List[str]] = {}
+        # Arguments that only depend on the config, built once
+        self._base_args = self._build_base_args()
 
     def is_available(self) -> bool:
         """Check if pandoc is available in the system."""
         return bool(shutil.which("pandoc"))
 
-    def build_command(self, input_path: str, output_path: str, filters_dir: str = "") -> List[str]:
-        """Build the pandoc command with all necessary arguments."""
-        cmd = ["pandoc", input_path]
+    def _build_base_args(self) -> List[str]:
+        """Build the pandoc arguments that don't depend on the filters directory."""
+        args = []
 
         # Add markdown format with extensions
         extensions = "+".join(self.config.markdown_extensions)
-        cmd.extend(["-f", f"markdown+{extensions}"])
+        args.extend(["-f", f"markdown+{extensions}"])
 
         # Add top-level division setting
         if self.config.top_level_division:
-            cmd.extend(["--top-level-division", self.config.top_level_division])
+            args.extend(["--top-level-division", self.config.top_level_division])
 
         # Add output format
-        cmd.extend(["-t", "latex"])
+        args.extend(["-t", "latex"])
 
         # Add wrapping setting
         if self.config.wrap:
-            cmd.extend(["--wrap", self.config.wrap])
+            args.extend(["--wrap", self.config.wrap])
 
         # Add syntax highlighting settings
         if self.config.highlight_style is None:
-            cmd.append("--no-highlight")
+            args.append("--no-highlight")
         else:
-            cmd.extend(["--highlight-style", self.config.highlight_style])
+            args.extend(["--highlight-style", self.config.highlight_style])
+
+        return args
+
+    def _conversion_args(self, filters_dir: str = "") -> List[str]:
+        """Build the pandoc arguments shared by single-file and batch conversion."""
+        args = list(self._base_args)
 
         # Add LUA filters
-        for filter in self.config.lua_filters:
-            filter_path = os.path.join(filters_dir, filter)
-            if os.path.exists(filter_path):
-                cmd.extend(["--lua-filter", filter_path])
-            else:
-                print(f"Warning: LUA filter not found: {filter_path}")
+        for filter_path in self._resolve_filters(filters_dir):
+            args.extend(["--lua-filter", filter_path])
 
-        # Add output path
-        cmd.extend(["-o", output_path])
+        return args
 
-        return cmd
+    def _resolve_filters(self, filters_dir: str) -> List[str]:
+        """Return the paths of the configured LUA filters that exist, checked once per directory."""
+        if filters_dir not in self._resolved_filters:
+            filter_paths = []
+            for filter in self.config.lua_filters:
+                filter_path = os.path.join(filters_dir, filter)
+                if os.path.exists(filter_path):
+                    filter_paths.append(filter_path)
+                else:
+                    print(f"Warning: LUA filter not found: {filter_path}")
+            self._resolved_filters[filters_dir] = filter_paths
+        return self._resolved_filters[filters_dir]
+
+    def build_command(self, input_path: str, output_path: str, filters_dir: str = "") -> List[str]:
+        """Build the pandoc command with all necessary arguments."""
+        return ["pandoc", input_path, *self._conversion_args(filters_dir), "-o", output_path]
 
-    def convert_to_latex(self, input_path: str, output_path: str, filters_dir: str = "") -> None:
+    def convert_to_latex(self,
+                         input_path: str,
+                         output_path: str,
+                         filters_dir: str = "",
+                         source: Optional[bytes] = None) -> None:
         """
         Convert a markdown file to LaTeX using pandoc.
         
@@ -84,6 +131,8 @@ class PandocService:
             input_path: Path to input markdown file
             output_path: Path to output LaTeX file
             filters_dir: Directory containing LUA filters
+            source: Contents of the input file if already read; passed
+                to pandoc on stdin instead of having it read the file again
         
         Raises:
             PandocError: If pandoc conversion fails
@@ -92,23 +141,197 @@ class PandocService:
         if not os.path.exists(input_path):
             raise FileNotFoundError(f"Input file not found: {input_path}")
 
-        cmd = self.build_command(input_path, output_path, filters_dir)
+        cmd = self.build_command("-" if source is not None else input_path, output_path, filters_dir)
 
         try:
-            result = subprocess.run(
+            # pandoc writes the result to the -o file, stdout stays empty
+            subprocess.run(
                 cmd,
+                input=source,
                 check=True,
-                capture_output=True,
-                text=True,
-                encoding='utf-8'
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE
             )
             print(f"Converted '{os.path.basename(input_path)}' to '{os.path.basename(output_path)}'")
         except subprocess.CalledProcessError as e:
             error_msg = f"Pandoc conversion failed:\nCommand: {' '.join(cmd)}\n"
-            if e.stdout:
-                error_msg += f"STDOUT:\n{e.stdout}\n"
             if e.stderr:
-                error_msg += f"STDERR:\n{e.stderr}"
+                error_msg += f"STDERR:\n{e.stderr.decode('utf-8', errors='replace')}"
             raise PandocError(error_msg) from e
         except FileNotFoundError:
-            raise PandocError("Pandoc command not found. Is it installed and in your PATH?")
\ No newline at end of file
+            raise PandocError("Pandoc command not found. Is it installed and in your PATH?")
+
+    def _run_to_stdout(self, cmd: List[str], source: Optional[bytes] = None) -> str:
+        """Run pandoc, optionally with markdown on stdin, and return the LaTeX output."""
+        try:
+            result = subprocess.run(
+                cmd,
+                input=source,
+                check=True,
+                capture_output=True
+            )
+        except subprocess.CalledProcessError as e:
+            error_msg = f"Pandoc conversion failed:\nCommand: {' '.join(cmd)}\n"
+            if e.stderr:
+                error_msg += f"STDERR:\n{e.stderr.decode('utf-8', errors='replace')}"
+            raise PandocError(error_msg) from e
+        except FileNotFoundError:
+            raise PandocError("Pandoc command not found. Is it installed and in your PATH?")
+        return result.stdout.decode('utf-8')
+
+    def convert_many_to_latex(self,
+                              md_paths: List[str],
+                              filters_dir: str = "",
+                              sources: Optional[List[bytes]] = None) -> List[str]:
+        """
+        Convert several markdown files to LaTeX with a single pandoc run.
+
+        The sources are passed to pandoc as separate files with --file-scope,
+        with a raw LaTeX marker block in between, and the output is split on
+        that marker again. Each file is parsed on its own, so an unterminated
+        code block can't swallow a marker and footnote or link labels don't
+        clash between chapters. pandoc runs in the caller's working
+        directory, as for a single conversion, but Lua filters see one
+        document holding all sources, and PANDOC_STATE.input_files lists
+        temporary copies instead of the chapter files.
+
+        Args:
+            md_paths: Paths to input markdown files, in order
+            filters_dir: Directory containing LUA filters
+            sources: Contents of the input files if already read, in the
+                same order as md_paths
+
+        Returns:
+            The LaTeX content for each input file, in the same order
+
+        Raises:
+            PandocError: If pandoc conversion fails
+            FileNotFoundError: If an input file doesn't exist
+        """
+        if not md_paths:
+            return []
+
+        for md_path in md_paths:
+            if not os.path.exists(md_path):
+                raise FileNotFoundError(f"Input file not found: {md_path}")
+
+        if sources is None:
+            sources = []
+            for md_path in md_paths:
+                with open(md_path, 'rb') as f:
+                    sources.append(f.read())
+
+        args = self._conversion_args(filters_dir)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            separator_path = os.path.join(tmp_dir, "separator.md")
+            with open(separator_path, 'w', encoding='utf-8') as f:
+                f.write(_BATCH_SEPARATOR)
+            inputs = []
+            for i, source in enumerate(sources):
+                source_path = os.path.join(tmp_dir, _BATCH_SOURCE_NAME.format(i))
+                with open(source_path, 'wb') as f:
+                    f.write(source)
+                    f.write(_BATCH_PROBE)
+                if inputs:
+                    inputs.append(separator_path)
+                inputs.append(source_path)
+
+            output = self._run_to_stdout(["pandoc", "--file-scope", *inputs, *args])
+
+        fragments = output.split(_BATCH_MARKER)
+        if len(fragments) == len(sources):
+            fragments = [_remove_batch_probe(fragment) for fragment in fragments]
+
+        if len(fragments) != len(sources) or None in fragments:
+            # A source contains the marker text itself, or swallowed its
+            # probe, so the output cannot be split reliably. Convert one by one.
+            print("Warning: Could not split batched pandoc output, converting files separately.")
+            cmd = ["pandoc", *args]
+            fragments = [self._run_to_stdout(cmd, source) for source in sources]
+        else:
+            print(f"Converted {len(sources)} files in a single pandoc run")
+
+        return [fragment.strip("\n") + "\n" for fragment in fragments]
+
+    def convert_many(self,
+                     inputs: List[str],
+                     outputs: List[str],
+                     filters_dir: str = "",
+                     sources: Optional[List[bytes]] = None) -> None:
+        """
+        Convert several markdown files to LaTeX files with a single pandoc run.
+
+        Args:
+            inputs: Paths to input markdown files
+            outputs: Paths to output LaTeX files, one per input
+            filters_dir: Directory containing LUA filters
+            sources: Contents of the input files if already read
+
+        Raises:
+            PandocError: If pandoc conversion fails
+            FileNotFoundError: If an input file doesn't exist
+            ValueError: If inputs and outputs differ in length
+        """
+        if len(inputs) != len(outputs):
+            raise ValueError(f"Got {len(inputs)} inputs but {len(outputs)} outputs")
+
+        latex_fragments = self.convert_many_to_latex(inputs, filters_dir, sources)
+        for output_path, latex in zip(outputs, latex_fragments):
+            safe_write_file(output_path, latex)
+
+    def convert_batch(self,
+                      pairs: List[Tuple[str, str]],
+                      filters_dir: str = "",
+                      max_workers: Optional[int] = None,
+                      sources: Optional[List[bytes]] = None) -> None:
+        """
+        Convert markdown files to LaTeX with one pandoc run each, several at a time.
+
+        Args:
+            pairs: (input markdown path, output LaTeX path) for each file
+            filters_dir: Directory containing LUA filters
+            max_workers: Maximum number of concurrent pandoc runs
+                (default: number of CPUs)
+            sources: Contents of the input files if already read, in the
+                same order as pairs
+
+        Raises:
+            PandocError: If a pandoc conversion fails
+            FileNotFoundError: If an input file doesn't exist
+        """
+        if sources is None:
+            sources = [None] * len(pairs)
+        max_workers = max(1, max_workers or os.cpu_count() or 1)
+        # Check the filters before the workers need them
+        self._resolve_filters(filters_dir)
+
+        # Threads are enough here, the work itself happens in pandoc subprocesses
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self.convert_to_latex, input_path, output_path, filters_dir, source)
+                for (input_path, output_path), source in zip(pairs, sources)
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Stop at the first failure instead of running the queued conversions
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+
+
+def _remove_batch_probe(fragment: str) -> Optional[str]:
+    """
+    Remove the probe from the LaTeX of one batched source, along with the
+    identifier prefix pandoc added to its labels and links.
+
+    Returns:
+        The cleaned LaTeX, or None if the probe isn't there exactly once
+    """
+    matches = list(_BATCH_PROBE_RE.finditer(fragment))
+    if len(matches) != 1:
+        return None
+    match = matches[0]
+    fragment = fragment[:match.start()] + fragment[match.end():]
+    prefix = match.group(1)
+    return fragment.replace(prefix, "") if prefix else fragment
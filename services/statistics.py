@@ -2,11 +2,19 @@
 Service for generating and managing book statistics.
 """
 from dataclasses import dataclass
+from datetime import datetime
 from typing import Dict, List, Optional
+import csv
 import os
-import pandas as pd
+import sys
 from core.chapter import Chapter, ChapterCollection
 
+# Columns of the progress tracking CSV file, in order
+PROGRESS_COLUMNS = [
+    'Date and time', 'Total Chapters', 'Total Words', 'Pages',
+    'Average Chapter Length', 'Comments', 'Todo'
+]
+
 
 @dataclass
 class StatisticsConfig:
@@ -41,6 +49,7 @@ class StatisticsService:
 
     def _calculate_statistics(self, collection: ChapterCollection) -> Dict:
         """Calculate various statistics from the chapter collection."""
+        collection.compute_all_stats()
         full_chapters = collection.get_full_chapters()
 
         stats = {
@@ -52,21 +61,24 @@ class StatisticsService:
             'total_todos': 0
         }
 
-        # Calculate per-act statistics
-        for part in range(stats['number_of_acts'] + 1):
-            chapters_in_act = collection.get_chapters_by_part(part)
-            if not chapters_in_act:
+        # Calculate per-act statistics in a single pass over the chapters
+        acts: Dict[int, List[int]] = {}
+        for ch in collection.chapters:
+            if not 0 <= ch.part <= stats['number_of_acts']:
                 continue
-
-            act_length = sum(ch.chapter_length for ch in chapters_in_act)
-            act_todos = sum(ch.count_todos() for ch in chapters_in_act)
-            act_comments = sum(ch.count_comments() for ch in chapters_in_act)
-
+            act = acts.setdefault(ch.part, [0, 0, 0, 0])
+            act[0] += 1
+            act[1] += ch.chapter_length
+            act[2] += ch.count_todos()
+            act[3] += ch.count_comments()
+
+        for part in sorted(acts):
+            num_chapters, act_length, act_todos, act_comments = acts[part]
             stats['acts_stats'].append({
                 'part': part,
-                'num_chapters': len(chapters_in_act),
+                'num_chapters': num_chapters,
                 'words': act_length,
-                'avg_chapter_length': act_length / len(chapters_in_act),
+                'avg_chapter_length': act_length / num_chapters,
                 'todos': act_todos,
                 'comments': act_comments
             })
@@ -101,77 +113,129 @@ class StatisticsService:
                          statistics_file: str) -> None:
         """Write statistics to a text file."""
         output_path = os.path.join(output_dir, statistics_file)
-
-        with open(output_path, "w") as f:
-            def write(*args):
-                print(*args, file=f)
-                print(*args)  # Also print to console
-
-            write("\n### " + book_title + " Statistics")
-            write(f"Total Chapters: {stats['total_chapters']}")
-            write(f"Total Words: {stats['total_words']}")
-            write(f"Number of acts: {stats['number_of_acts']}")
-
-            for act_stat in stats['acts_stats']:
-                write(f"      Part {act_stat['part']} - "
-                      f"Chapters: {act_stat['num_chapters']}, "
-                      f"Words: {act_stat['words']}")
-                write(f"          Average Chapter Length: "
-                      f"{act_stat['avg_chapter_length']:.2f} words")
-
-                if act_stat['todos'] > 0:
-                    write(f"          TODOs in Part {act_stat['part']}: "
-                          f"{act_stat['todos']}")
-                if act_stat['comments'] > 0:
-                    write(f"          Comments in Part {act_stat['part']}: "
-                          f"{act_stat['comments']}")
-
-            if 'pages' in stats:
-                write(f"  Approximate (full text) Pages: {stats['pages']:.2f} "
-                      f"(based on {self.config.words_per_page} words per page)")
-            if 'avg_chapter_length' in stats:
-                write(f"Average Chapter Length: {stats['avg_chapter_length']:.2f} words")
-            if 'shortest_chapter' in stats:
-                write(f"Shortest Chapter: {stats['shortest_chapter']['number']} "
-                      f"({stats['shortest_chapter']['length']} words)")
-            if 'longest_chapter' in stats:
-                write(f"Longest Chapter: {stats['longest_chapter']['number']} "
-                      f"({stats['longest_chapter']['length']} words)")
+        # Collect the lines, then write them to the file and console once each
+        lines = []
+        write = lines.append
+
+        write("\n### " + book_title + " Statistics")
+        write(f"Total Chapters: {stats['total_chapters']}")
+        write(f"Total Words: {stats['total_words']}")
+        write(f"Number of acts: {stats['number_of_acts']}")
+
+        for act_stat in stats['acts_stats']:
+            write(f"      Part {act_stat['part']} - "
+                  f"Chapters: {act_stat['num_chapters']}, "
+                  f"Words: {act_stat['words']}")
+            write(f"          Average Chapter Length: "
+                  f"{act_stat['avg_chapter_length']:.2f} words")
+
+            if act_stat['todos'] > 0:
+                write(f"          TODOs in Part {act_stat['part']}: "
+                      f"{act_stat['todos']}")
+            if act_stat['comments'] > 0:
+                write(f"          Comments in Part {act_stat['part']}: "
+                      f"{act_stat['comments']}")
+
+        if 'pages' in stats:
+            write(f"  Approximate (full text) Pages: {stats['pages']:.2f} "
+                  f"(based on {self.config.words_per_page} words per page)")
+        if 'avg_chapter_length' in stats:
+            write(f"Average Chapter Length: {stats['avg_chapter_length']:.2f} words")
+        if 'shortest_chapter' in stats:
+            write(f"Shortest Chapter: {stats['shortest_chapter']['number']} "
+                  f"({stats['shortest_chapter']['length']} words)")
+        if 'longest_chapter' in stats:
+            write(f"Longest Chapter: {stats['longest_chapter']['number']} "
+                  f"({stats['longest_chapter']['length']} words)")
+
+        text = "\n".join(lines) + "\n"
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        sys.stdout.write(text)  # Also print to console
 
     def _update_progress_csv(self,
                            stats: Dict,
                            book_title: str,
                            output_dir: str) -> None:
-        """Update the progress tracking CSV file."""
+        """Append the current totals to the progress tracking CSV file."""
         safe_name = book_title.replace(" ", "_").replace(":", "")
         progress_file = os.path.join(output_dir, f"{safe_name}_progress.csv")
 
-        progress_data = {
-            'Date and time': [pd.Timestamp.now()],
-            'Total Chapters': [stats['total_chapters']],
-            'Total Words': [stats['total_words']],
-            'Pages': [int(stats.get('pages', 0))],
-            'Average Chapter Length': [int(stats.get('avg_chapter_length', 0))],
-            'Comments': [int(stats['total_comments'])],
-            'Todo': [int(stats['total_todos'])]
-        }
-
-        # Convert to dataframe
-        df = pd.DataFrame(progress_data)
-
-        def save(df_to_save, df_to_concat):
-            df_to_save = pd.concat([df_to_concat, df_to_save], ignore_index=True)
-            df_to_save.to_csv(progress_file, index=False)
+        row = [
+            datetime.now().isoformat(sep=' '),
+            stats['total_chapters'],
+            stats['total_words'],
+            int(stats.get('pages', 0)),
+            int(stats.get('avg_chapter_length', 0)),
+            int(stats['total_comments']),
+            int(stats['total_todos'])
+        ]
+
+        if not os.path.exists(progress_file):
+            with open(progress_file, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, lineterminator=os.linesep)
+                writer.writerow(PROGRESS_COLUMNS)
+                writer.writerow(row)
             print(f"Saved progress to: {progress_file}")
-
-        # Append to existing file if it exists
-        if os.path.exists(progress_file):
-            df_existing = pd.read_csv(progress_file)
-            try: #This is horribly ugly lol. Remove try catch and make sure the values in the if are ok manually instead...
-                if df_existing["Total Words"].values[-1] != df["Total Words"].values[-1]:
-                    save(df, df_existing)
-                else:
-                    print("Info: Total words unchanged between versions. Skipping updating statistics.")
-            except:
-                print(f"Warning: Failed to read last row in {progress_file}, appending new value.")
-                save()
\ No newline at end of file
+            return
+
+        last_row = _read_last_row(progress_file)
+        last_words = last_row.get('Total Words', '').strip() if last_row else ''
+        if not last_words.isdecimal():
+            print(f"Warning: Failed to read last row in {progress_file}, appending new value.")
+        elif int(last_words) == stats['total_words']:
+            print("Info: Total words unchanged between versions. Skipping updating statistics.")
+            return
+
+        needs_newline = not _ends_with_newline(progress_file)
+        with open(progress_file, "a", newline="", encoding="utf-8") as f:
+            if needs_newline:
+                f.write(os.linesep)
+            csv.writer(f, lineterminator=os.linesep).writerow(row)
+        print(f"Saved progress to: {progress_file}")
+
+
+def _read_last_row(path: str, tail_size: int = 4096) -> Optional[Dict[str, str]]:
+    """
+    Read the last row of a CSV file without reading the whole file.
+
+    Only the header line and the final tail_size bytes are read, so the cost
+    does not grow with the number of rows.
+
+    Args:
+        path: Path to the CSV file
+        tail_size: Number of bytes read from the end of the file
+
+    Returns:
+        The last row keyed by the header columns, or None if the file has
+        no data rows or the last row does not fit in the tail
+    """
+    with open(path, "rb") as f:
+        header = f.readline()
+        end = f.seek(0, os.SEEK_END)
+        start = max(0, end - tail_size)
+        f.seek(start)
+        tail = f.read().rstrip(b"\r\n")
+
+    newline = tail.rfind(b"\n")
+    if not tail or (newline == -1 and start > 0):
+        return None
+    if start + newline + 1 < len(header):
+        # The last line is the header itself
+        return None
+
+    try:
+        columns = next(csv.reader([header.decode("utf-8")]))
+        values = next(csv.reader([tail[newline + 1:].decode("utf-8")]))
+    except (UnicodeDecodeError, StopIteration):
+        return None
+    return dict(zip(columns, values))
+
+
+def _ends_with_newline(path: str) -> bool:
+    """Check whether a file is empty or ends with a newline."""
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
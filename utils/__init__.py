@@ -5,12 +5,13 @@ from .file_ops import (
 )
 from .path_utils import (
     normalize_path, ensure_absolute_path, get_project_root,
-    split_path, find_files, is_subpath
+    split_path, compile_glob_patterns, split_glob_patterns, find_files, is_subpath
 )
 
 __all__ = [
     'ensure_directory', 'clean_directory', 'safe_read_file',
     'safe_write_file', 'copy_with_backup', 'get_relative_path',
     'normalize_path', 'ensure_absolute_path', 'get_project_root',
-    'split_path', 'find_files', 'is_subpath'
+    'split_path', 'compile_glob_patterns', 'split_glob_patterns',
+    'find_files', 'is_subpath'
 ]
\ No newline at end of file
@@ -1,11 +1,19 @@
 """
 File operation utilities for the book generation system.
 """
+import codecs
+import functools
+import glob
 import os
 import shutil
-import glob
 from typing import List, Optional
+from .path_utils import compile_glob_patterns, split_glob_patterns
+
+# Content above this size is written in binary mode when possible
+LARGE_WRITE_SIZE = 1024 * 1024
 
+# Encodings in which ASCII text encodes to the same bytes
+_ASCII_COMPATIBLE_ENCODINGS = {'utf-8', 'ascii', 'iso8859-1', 'cp1252'}
 
 def ensure_directory(directory: str) -> None:
     """
@@ -29,13 +37,31 @@ def clean_directory(directory: str,
         exclude: Optional list of filenames to preserve
     """
     exclude = exclude or []
-    for pattern in patterns:
-        for filepath in glob.glob(os.path.join(directory, pattern)):
-            if os.path.basename(filepath) not in exclude:
-                try:
-                    os.remove(filepath)
-                except OSError as e:
-                    print(f"Error deleting '{filepath}': {e}")
+    name_patterns, path_patterns = split_glob_patterns(patterns)
+
+    # Patterns reaching into subdirectories are left to glob
+    to_delete = []
+    for pattern in path_patterns:
+        to_delete.extend(glob.glob(os.path.join(directory, pattern)))
+
+    if name_patterns:
+        matcher = compile_glob_patterns(tuple(name_patterns))
+        try:
+            with os.scandir(directory) as entries:
+                to_delete.extend(
+                    entry.path for entry in entries
+                    if matcher.match(os.path.normcase(entry.name))
+                )
+        except FileNotFoundError:
+            pass
+
+    for filepath in dict.fromkeys(to_delete):
+        if os.path.basename(filepath) in exclude:
+            continue
+        try:
+            os.remove(filepath)
+        except OSError as e:
+            print(f"Error deleting '{filepath}': {e}")
 
 
 def safe_read_file(filepath: str, encoding: str = 'utf-8') -> str:
@@ -53,13 +79,16 @@ def safe_read_file(filepath: str, encoding: str = 'utf-8') -> str:
         FileNotFoundError: If the file doesn't exist
         IOError: If there's an error reading the file
     """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+
+    # Universal newlines, as text mode would give
     try:
-        with open(filepath, 'r', encoding=encoding) as f:
-            return f.read()
+        text = data.decode(encoding)
     except UnicodeDecodeError:
         # Try with a different encoding if UTF-8 fails
-        with open(filepath, 'r', encoding='latin-1') as f:
-            return f.read()
+        text = data.decode('latin-1')
+    return text.replace('\r\n', '\n').replace('\r', '\n')
 
 
 def safe_write_file(filepath: str,
@@ -79,11 +108,23 @@ def safe_write_file(filepath: str,
         IOError: If there's an error writing the file
     """
     if create_dirs:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        directory = os.path.dirname(filepath)
+        if directory:  # A bare file name has no directory to create
+            os.makedirs(directory, exist_ok=True)
     
     try:
-        with open(filepath, 'w', encoding=encoding) as f:
-            f.write(content)
+        if (len(content) > LARGE_WRITE_SIZE and content.isascii()
+                and codecs.lookup(encoding).name in _ASCII_COMPATIBLE_ENCODINGS):
+            # Encode once and skip the text layer; translate newlines the
+            # way text mode would
+            data = content.encode('ascii')
+            if os.linesep != '\n':
+                data = data.replace(b'\n', os.linesep.encode('ascii'))
+            with open(filepath, 'wb') as f:
+                f.write(data)
+        else:
+            with open(filepath, 'w', encoding=encoding) as f:
+                f.write(content)
     except IOError as e:
         raise IOError(f"Error writing to '{filepath}': {e}")
 
@@ -97,14 +138,34 @@ def copy_with_backup(src: str, dst: str, backup_suffix: str = '.bak') -> None:
         dst: Destination file path
         backup_suffix: Suffix for backup files
     """
-    if os.path.exists(dst):
-        backup = dst + backup_suffix
-        try:
-            shutil.copy2(dst, backup)
-        except OSError as e:
-            print(f"Warning: Could not create backup of '{dst}': {e}")
+    if os.path.isdir(dst):
+        dst = os.path.join(dst, os.path.basename(src))
+
+    # samefile also raises FileNotFoundError for a missing src before dst is touched
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"'{src}' and '{dst}' are the same file")
+
+    # The old file is about to be replaced anyway, so move it aside
+    # instead of copying it
+    backup = dst + backup_suffix
+    moved = False
+    try:
+        os.replace(dst, backup)
+        moved = True
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Warning: Could not create backup of '{dst}': {e}")
     
-    shutil.copy2(src, dst)
+    try:
+        # Same as copy2: copyfile uses the platform's fast copy (e.g. sendfile)
+        shutil.copyfile(src, dst)
+        shutil.copystat(src, dst)
+    except BaseException:
+        # Put the old file back, so a failed copy leaves dst as it was
+        if moved:
+            os.replace(backup, dst)
+        raise
 
 
 def get_relative_path(path: str, base: str) -> str:
@@ -118,4 +179,11 @@ def get_relative_path(path: str, base: str) -> str:
     Returns:
         Relative path as a string
     """
+    # Resolve the paths first, so the cache isn't keyed on relative paths
+    return _relative_path(os.path.abspath(path), os.path.abspath(base))
+
+
+@functools.lru_cache(maxsize=None)
+def _relative_path(path: str, base: str) -> str:
+    """Cached os.path.relpath for absolute paths."""
     return os.path.relpath(path, base)
\ No newline at end of file
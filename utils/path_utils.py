@@ -1,8 +1,12 @@
 """
 Path handling utilities for the book generation system.
 """
+import fnmatch
+import functools
+import glob
 import os
-from typing import List, Optional, Tuple
+import re
+from typing import List, Optional, Pattern, Tuple
 
 
 def normalize_path(path: str) -> str:
@@ -52,11 +56,23 @@ def get_project_root(start_path: str = None) -> str:
     if start_path is None:
         start_path = os.getcwd()
 
-    markers = ['config.yml', '.git', 'pyproject.toml', 'setup.py']
+    # Resolve the path first, so the cache isn't keyed on a relative path
+    return _find_project_root(os.path.abspath(start_path))
+
+
+@functools.lru_cache(maxsize=None)
+def _find_project_root(current: str) -> str:
+    """Walk up from an absolute path to the first directory with a project marker."""
+    markers = {'config.yml', '.git', 'pyproject.toml', 'setup.py'}
     
-    current = os.path.abspath(start_path)
     while True:
-        if any(os.path.exists(os.path.join(current, marker)) for marker in markers):
+        # One directory listing per level instead of a stat per marker
+        try:
+            with os.scandir(current) as entries:
+                names = {os.path.normcase(entry.name) for entry in entries}
+        except OSError:
+            names = set()
+        if markers & names:
             return current
         
         parent = os.path.dirname(current)
@@ -81,6 +97,49 @@ def split_path(path: str) -> Tuple[str, str, str]:
     return directory, name, ext
 
 
+@functools.lru_cache(maxsize=None)
+def compile_glob_patterns(patterns: Tuple[str, ...]) -> Pattern[str]:
+    """
+    Compile glob patterns into a single regex matching file names.
+
+    Like glob, patterns not starting with a dot don't match hidden files.
+    Names must be passed through os.path.normcase before matching. Only
+    name patterns are supported, see split_glob_patterns.
+
+    Args:
+        patterns: Tuple of glob patterns
+
+    Returns:
+        Compiled regex matching any of the patterns
+    """
+    return re.compile('|'.join(
+        fnmatch.translate(os.path.normcase(pattern)) if pattern.startswith('.')
+        else r'(?!\.)' + fnmatch.translate(os.path.normcase(pattern))
+        for pattern in patterns
+    ))
+
+
+def split_glob_patterns(patterns: List[str]) -> Tuple[List[str], List[str]]:
+    """
+    Split glob patterns into patterns matching a file name and patterns
+    matching a path (with a separator or a recursive '**' component).
+
+    Args:
+        patterns: List of glob patterns
+
+    Returns:
+        Tuple of (name patterns, path patterns)
+    """
+    separators = [sep for sep in (os.sep, os.altsep, '/') if sep]
+    name_patterns, path_patterns = [], []
+    for pattern in patterns:
+        if pattern == '**' or any(sep in pattern for sep in separators):
+            path_patterns.append(pattern)
+        else:
+            name_patterns.append(pattern)
+    return name_patterns, path_patterns
+
+
 def find_files(directory: str,
                patterns: List[str],
                recursive: bool = True) -> List[str]:
@@ -95,18 +154,33 @@ def find_files(directory: str,
     Returns:
         List of matching file paths
     """
-    import glob
+    name_patterns, path_patterns = split_glob_patterns(patterns)
 
-    matches = []
-    for pattern in patterns:
+    # Patterns spanning directories are left to glob
+    matches = set()
+    for pattern in path_patterns:
         if recursive:
             search_pattern = os.path.join(directory, '**', pattern)
-            matches.extend(glob.glob(search_pattern, recursive=True))
+            matches.update(glob.glob(search_pattern, recursive=True))
         else:
-            search_pattern = os.path.join(directory, pattern)
-            matches.extend(glob.glob(search_pattern))
+            matches.update(glob.glob(os.path.join(directory, pattern)))
+
+    if not name_patterns:
+        return sorted(matches)
+
+    # One regex for all name patterns, so the tree is only walked once
+    matcher = compile_glob_patterns(tuple(name_patterns))
+    for root, dirnames, filenames in os.walk(directory, followlinks=True):
+        matches.update(
+            os.path.join(root, name) for name in dirnames + filenames
+            if matcher.match(os.path.normcase(name))
+        )
+        if not recursive:
+            break
+        # glob's '**' doesn't descend into hidden directories
+        dirnames[:] = [name for name in dirnames if not name.startswith('.')]
     
-    return sorted(set(matches))  # Remove duplicates and sort
+    return sorted(matches)
 
 
 def is_subpath(path: str, parent: str) -> bool:
@@ -120,11 +194,11 @@ def is_subpath(path: str, parent: str) -> bool:
     Returns:
         True if path is a subpath of parent, False otherwise
     """
-    path = os.path.abspath(path)
-    parent = os.path.abspath(parent)
-    
+    path = os.path.normcase(os.path.abspath(path))
+    parent = os.path.normcase(os.path.abspath(parent))
+
+    # commonpath compares whole components, so '/a/bc' is not inside '/a/b'
     try:
-        os.path.relpath(path, parent)
-        return True
-    except ValueError:
+        return os.path.commonpath([path, parent]) == parent
+    except ValueError:  # Paths on different drives
         return False
\ No newline at end of file